@@ -49,6 +49,11 @@ class UpsEnum(Enum):
         """ Return a list of name from current UpsEnum object """
         return list(map(lambda c: c.name, cls))
 
+    @classmethod
+    def has_name(cls, name: str) -> bool:
+        """ Return True if name is a member name of current UpsEnum object, without building a list. """
+        return isinstance(name, str) and name in cls.__members__
+
 
 class UpsType(UpsEnum):
     """ Enum object to define keys for UPS type.
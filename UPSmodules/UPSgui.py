@@ -218,7 +218,7 @@ class GuiProps:
 
         .. note:: Code copied from Stack Overflow
         """
-        if not re.fullmatch(PATTERNS['HEXRGB'], value):
+        if not PATTERNS['HEXRGB'].fullmatch(value):
             raise ValueError('Invalid hex color format in {}'.format(value))
         value = value.lstrip('#')
         if len(value) != 6:
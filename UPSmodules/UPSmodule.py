@@ -28,21 +28,29 @@ __docformat__ = 'reStructuredText'
 # pylint: disable=line-too-long
 # pylint: disable=consider-using-f-string
 
+import atexit
 import copy
+import hashlib
 import os
 import sys
 import re
 import shlex
+import stat
 import shutil
-from time import sleep
+from time import time
 from datetime import datetime
 import json
+import operator
 import subprocess
+import threading
 import logging
 import pprint
 import configparser
-from typing import Tuple, List, Union, Dict, Generator, Set, Optional
-from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Tuple, List, Union, Dict, Generator, Set, FrozenSet, Optional, Mapping, Iterator, \
+    ItemsView, KeysView, ValuesView, Callable, Any
+from uuid import uuid5, NAMESPACE_OID
 from UPSmodules.env import UT_CONST
 from UPSmodules.UPSKeys import UpsType, UpsStatus, MibGroup, TxtStyle, MarkUpCodes, MiB
 
@@ -51,27 +59,131 @@ LOGGER = logging.getLogger('ups-utils')
 
 
 class ObjDict(dict):
-    """ Allow access of dictionary keys by key name.
+    """ Allow access of dictionary keys by key name.  Attributes are stored only as dictionary
+        items, so instances have no __dict__.
     """
     # pylint: disable=attribute-defined-outside-init
     # pylint: disable=too-many-instance-attributes
+    __slots__ = ()
+
     def __getattr__(self, name) -> str:
-        if name in self:
+        try:
             return self[name]
-        raise AttributeError('No such attribute: {}'.format(name))
+        except KeyError as error:
+            raise AttributeError('No such attribute: {}'.format(name)) from error
 
-    def __setattr__(self, name, value) -> None:
-        self[name] = value
+    __setattr__ = dict.__setitem__
 
     def __delattr__(self, name) -> None:
-        if name in self:
+        try:
             del self[name]
-        else:
-            raise AttributeError('No such attribute: {}'.format(name))
+        except KeyError as error:
+            raise AttributeError('No such attribute: {}'.format(name)) from error
+
+
+class ProbeCache:
+    """ Persistent cache of successful UPS accessibility and snmp responsiveness probes, so that
+        building a UpsList does not have to ping and query every UPS on each start.  Only the
+        time of a successful probe is stored, so an unreachable UPS is always probed again.
+    """
+    ttl: float = 300.0
+    _cache: Dict[str, float] = {}
+    _loaded: bool = False
+    _modified: bool = False
+    _load_lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(ups_item: 'UpsItem') -> str:
+        """ Get the cache key for the given UPS.  The community string is included as a hash, so a
+            config change invalidates the entry without storing the community string.
+
+        :param ups_item: The target UPS
+        :return: Cache key as str
+        """
+        community_hash = hashlib.sha256(str(ups_item.prm['snmp_community']).encode('utf-8')).hexdigest()[:16]
+        return '{}|{}|{}'.format(ups_item.prm['ups_IP'], ups_item.prm['ups_type'], community_hash)
+
+    @staticmethod
+    def is_valid_entry(entry: Any) -> bool:
+        """ Check if the given probe cache entry has the expected format.
+
+        :param entry: A probe cache entry
+        :return: True if entry is a numeric probe time
+        """
+        return isinstance(entry, (int, float)) and not isinstance(entry, bool)
+
+    @classmethod
+    def load(cls) -> None:
+        """ Read the probe cache file, ignoring it if missing or invalid and dropping invalid entries.
+            UPSs are probed concurrently, so only the first caller reads the file.
+        """
+        with cls._load_lock:
+            if cls._loaded: return
+            atexit.register(cls.save)
+            try:
+                with open(UT_CONST.probe_cache_file, mode='r', encoding='utf-8') as cache_file:
+                    cache_data = json.load(cache_file)
+            except (OSError, ValueError) as error:
+                LOGGER.debug('Probe cache not loaded from [%s]: %s', UT_CONST.probe_cache_file, error)
+                cache_data = None
+            if isinstance(cache_data, dict):
+                cls._cache = {key: value for key, value in cache_data.items() if cls.is_valid_entry(value)}
+                if len(cls._cache) != len(cache_data):
+                    LOGGER.debug('Dropped %s invalid probe cache entries', len(cache_data) - len(cls._cache))
+                    cls._modified = True
+            cls._loaded = True
+
+    @classmethod
+    def save(cls) -> None:
+        """ Write the probe cache file, if modified.  Called at exit, so errors are only logged.
+        """
+        if not cls._modified: return
+        try:
+            now = time()
+            cache_data = {key: value for key, value in cls._cache.items() if now - value < cls.ttl}
+            os.makedirs(os.path.dirname(UT_CONST.probe_cache_file), mode=0o700, exist_ok=True)
+            with open(os.open(UT_CONST.probe_cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600),
+                      mode='w', encoding='utf-8') as cache_file:
+                json.dump(cache_data, cache_file)
+        except (OSError, TypeError, ValueError) as error:
+            LOGGER.debug('Probe cache not saved to [%s]: %s', UT_CONST.probe_cache_file, error)
+            return
+        cls._modified = False
+
+    @classmethod
+    def get(cls, ups_item: 'UpsItem') -> Optional[Tuple[bool, bool]]:
+        """ Get cached probe results for the given UPS.
+
+        :param ups_item: The target UPS
+        :return: Tuple of accessible and responsive flags, or None if not cached, expired, or disabled
+        """
+        if UT_CONST.no_cache: return None
+        if not cls._loaded: cls.load()
+        probe_time = cls._cache.get(cls.cache_key(ups_item))
+        if probe_time is not None and time() - probe_time < cls.ttl:
+            return True, True
+        return None
+
+    @classmethod
+    def set(cls, ups_item: 'UpsItem', accessible: bool, responsive: bool) -> None:
+        """ Store probe results for the given UPS.  A failed probe removes any cached entry.
+
+        :param ups_item: The target UPS
+        :param accessible: Result of the ip access check
+        :param responsive: Result of the snmp response check
+        """
+        if not cls._loaded: cls.load()
+        key = cls.cache_key(ups_item)
+        if accessible and responsive:
+            cls._cache[key] = time()
+        elif cls._cache.pop(key, None) is None:
+            return
+        cls._modified = True
 
 
 class UpsItem:
     """ Object to represent a UPS """
+    __slots__ = ('skip_list', 'prm', 'ups_comm', 'all_cmd_group', 'daemon')
     _json_keys: Set[str] = {'ups_IP', 'display_name', 'ups_type', 'daemon',
                             'snmp_community', 'uuid', 'ups_model', 'ups_nmc_model'}
 
@@ -129,6 +241,7 @@ class UpsItem:
         MiB.battery_status)
     _short_list: Set[Union[str, MiB]] = {'ups_IP', 'display_name', MiB.ups_model, 'responsive', 'daemon'}
     table_list: Set[Union[str, MiB]] = {'display_name', 'ups_IP', 'ups_type', MiB.ups_model, 'ups_nmc_model', 'daemon'}
+    _table_list_initialized: bool = False
     mark_up_codes = UT_CONST.mark_up_codes
 
     def __init__(self, json_details: dict):
@@ -137,7 +250,7 @@ class UpsItem:
         :param json_details: A dictionary containing configuration details from json file.
         """
         # UPS list from ups-config.json for monitor and ls utils.
-        self.skip_list: List[Union[str, MiB]] = []
+        self.skip_list: Set[Union[str, MiB]] = set()
         self.prm: ObjDict = ObjDict({
             'uuid': None,
             'ups_IP': None,
@@ -161,8 +274,8 @@ class UpsItem:
                 LOGGER.debug('%s: Invalid key [%s] ignored', UT_CONST.ups_json_file, item_name)
                 continue
             if item_name == 'ups_type':
-                if re.search(UT_CONST.PATTERNS['APC96'], item_value): item_value = 'apc_ap96xx'
-                if item_value in UpsType.list():
+                if UT_CONST.PATTERNS['APC96'].search(item_value): item_value = 'apc_ap96xx'
+                if UpsType.has_name(item_value):
                     self.prm['valid'] = True
                     self.prm['compatible'] = True
                     self.prm[item_name] = UpsType[item_value]
@@ -175,29 +288,41 @@ class UpsItem:
             else:
                 self.prm[item_name] = item_value
 
-        if self.prm['ups_type'] in UpsType.list():
+        if UpsType.has_name(self.prm['ups_type']):
             self.prm['compatible'] = True
 
         # Check accessibility
         self.ups_comm: UpsComm = UpsComm(self)
         if self.ups_comm.is_valid_ip_fqdn(self.prm['ups_IP']):
             self.prm['valid'] = self.prm['valid'] and True
-        if self.ups_comm.check_ip_access(self.prm['ups_IP']):
+            probe_results = ProbeCache.get(self)
+            if probe_results is None:
+                probe_results = (self.ups_comm.check_ip_access(self.prm['ups_IP']),
+                                 self.ups_comm.check_snmp_response(self))
+                ProbeCache.set(self, *probe_results)
+        else:
+            # An invalid address can not be reached, so skip the probes and their timeouts.
+            probe_results = (False, False)
+        if probe_results[0]:
             self.prm['accessible'] = True
-        if self.ups_comm.check_snmp_response(self):
+        if probe_results[1]:
             self.prm['responsive'] = True
 
         mib_cmd_group = UpsType.apc_ap96xx \
-            if re.search(UT_CONST.PATTERNS['APC'], self.prm['ups_type'].name) \
+            if UT_CONST.PATTERNS['APC'].search(self.prm['ups_type'].name) \
             else UpsType.eaton_pw
         self.prm['mib_commands'] = self.ups_comm.all_mib_cmds[mib_cmd_group]
+        self.all_cmd_group: MibGroup = MibGroup.all_apc if self.prm['ups_type'] == UpsType.apc_ap96xx \
+            else MibGroup.all_eaton
         self.daemon = None
 
     @classmethod
     def initialize_cls_table_list(cls) -> None:
-        """ Initialize the class data table_list.
+        """ Initialize the class data table_list.  Only the first call builds it.
         """
+        if cls._table_list_initialized: return
         cls.table_list = cls.table_list.union(UpsComm.all_mib_cmd_names[MibGroup.monitor])
+        cls._table_list_initialized = True
 
     def __getitem__(self, param_name: str) -> any:
         try:
@@ -212,7 +337,8 @@ class UpsItem:
         return '{} - {} - {}'.format(self['uuid'], self['display_name'], self['ups_IP'])
 
     def __str__(self) -> str:
-        return re.sub(r'\'', '\"', pprint.pformat(self.prm, indent=2, width=120))
+        return '\n'.join('{}: {}'.format(param_name, param_value) for param_name, param_value in self.prm.items()
+                         if param_name != 'mib_commands')
 
     def mib_command_names(self, cmd_group: Optional[MibGroup] = None) -> Generator[str, None, None]:
         """ Returns mib command names for the given command group.
@@ -220,15 +346,11 @@ class UpsItem:
         :param cmd_group: Specifies the group of MIB commands.  Default is all.
         :return: Generator yielding mib command names
         """
-        if not cmd_group:
-            cmd_group = MibGroup.all
-        if cmd_group == MibGroup.all:
-            if self.prm.ups_type == UpsType.apc_ap96xx:
-                cmd_group = MibGroup.all_apc
-            else:
-                cmd_group = MibGroup.all_eaton
+        if not cmd_group or cmd_group == MibGroup.all:
+            cmd_group = self.all_cmd_group
+        group_cmd_names = UpsComm.all_mib_cmd_names[cmd_group]
         for cmd_name in self.ups_comm.mib_commands:
-            if cmd_name in UpsComm.all_mib_cmd_names[cmd_group]:
+            if cmd_name in group_cmd_names:
                 yield cmd_name
 
     def get_ups_parameter_value(self, param_name: str) -> Optional[str]:
@@ -237,7 +359,7 @@ class UpsItem:
         :param param_name: Target parameter name
         :return: Parameter value as string else None
         """
-        return self.prm[param_name] if param_name in self.prm.keys() else None
+        return self.prm.get(param_name)
 
     def ups_uuid(self) -> str:
         """ Get the uuid value for the target UPS or active UPS if target is None.
@@ -260,7 +382,7 @@ class UpsItem:
         """
         return self.prm['ups_type']
 
-    def ups_ip(self) -> None:
+    def ups_ip(self) -> str:
         """ Get the IP address value for the target UPS or active UPS if target is None.
 
         :return:  The IP address as a str.
@@ -269,15 +391,15 @@ class UpsItem:
 
     def is_compatible(self):
         """ Return flag indicating compatibility """
-        return self.prm.compatible
+        return self.prm['compatible']
 
     def is_accessible(self):
         """ Return flag indicating accessibility """
-        return self.prm.accessible
+        return self.prm['accessible']
 
     def is_responsive(self):
         """ Return flag indicating ability to respond to ping """
-        return self.prm.responsive
+        return self.prm['responsive']
 
     def send_snmp_command(self, cmd_mib: MiB, display: bool = True) -> str:
         """ Send the given command to UPS using UpsComm object """
@@ -340,17 +462,23 @@ class UpsDaemon:
         'DaemonScripts': _daemon_scripts,
         'DaemonParameters': _daemon_param_names}
     config_name_list: List[str] = ['DaemonPaths', 'DaemonScripts', 'DaemonParameters']
-
-    daemon_param_defaults: Dict[str, Union[str, Dict[str, int]]] = {
+    _INI_RE = UT_CONST.PATTERNS['INI']
+
+    # Checks crit must pass against warn and limit, by limit_type: (bound name, operator text, test).
+    _threshold_checks: Dict[str, Tuple[Tuple[str, str, Callable[[int, int], bool]], ...]] = {
+        'high': (('warn', '>', operator.gt), ('limit', '<=', operator.le)),
+        'low': (('warn', '<', operator.lt), ('limit', '>=', operator.ge))}
+    # Defaults are read-only, so they are shared until a config value is written.
+    daemon_param_defaults: Dict[str, Union[str, Mapping[str, Union[str, int]]]] = {
         'ups_utils_script_path': os.path.expanduser('~/.local/bin/'),
         # Low limit
-        'read_interval': {'monitor': 10, 'daemon': 30, 'limit': 10, 'limit_type': 'low'},
-        'threshold_battery_time_rem': {'crit': 5, 'warn': 10, 'limit': 4, 'limit_type': 'low'},
-        'threshold_battery_capacity': {'crit': 10, 'warn': 50, 'limit': 5, 'limit_type': 'low'},
+        'read_interval': MappingProxyType({'monitor': 10, 'daemon': 30, 'limit': 10, 'limit_type': 'low'}),
+        'threshold_battery_time_rem': MappingProxyType({'crit': 5, 'warn': 10, 'limit': 4, 'limit_type': 'low'}),
+        'threshold_battery_capacity': MappingProxyType({'crit': 10, 'warn': 50, 'limit': 5, 'limit_type': 'low'}),
         # High limit
-        'threshold_env_temp': {'crit': 35, 'warn': 30, 'limit': 35, 'limit_type': 'high'},
-        'threshold_battery_load': {'crit': 90, 'warn': 80, 'limit': 95, 'limit_type': 'high'},
-        'threshold_time_on_battery': {'crit': 5, 'warn': 3, 'limit': 90, 'limit_type': 'high'},
+        'threshold_env_temp': MappingProxyType({'crit': 35, 'warn': 30, 'limit': 35, 'limit_type': 'high'}),
+        'threshold_battery_load': MappingProxyType({'crit': 90, 'warn': 80, 'limit': 95, 'limit_type': 'high'}),
+        'threshold_time_on_battery': MappingProxyType({'crit': 5, 'warn': 3, 'limit': 90, 'limit_type': 'high'}),
     }
     daemon_param_dict: Dict[str, str] = {
         'mib_ups_env_temp': 'threshold_env_temp',
@@ -364,12 +492,16 @@ class UpsDaemon:
         'boinc_home': None, 'ups_utils_script_path': daemon_param_defaults['ups_utils_script_path'],
         'suspend_script': None, 'resume_script': None,
         'shutdown_script': None, 'cancel_shutdown_script': None,
-        'read_interval': daemon_param_defaults['read_interval'].copy(),
-        'threshold_env_temp': daemon_param_defaults['threshold_env_temp'].copy(),
-        'threshold_battery_time_rem': daemon_param_defaults['threshold_battery_time_rem'].copy(),
-        'threshold_time_on_battery': daemon_param_defaults['threshold_time_on_battery'].copy(),
-        'threshold_battery_load': daemon_param_defaults['threshold_battery_load'].copy(),
-        'threshold_battery_capacity': daemon_param_defaults['threshold_battery_capacity'].copy()}
+        'read_interval': daemon_param_defaults['read_interval'],
+        'threshold_env_temp': daemon_param_defaults['threshold_env_temp'],
+        'threshold_battery_time_rem': daemon_param_defaults['threshold_battery_time_rem'],
+        'threshold_time_on_battery': daemon_param_defaults['threshold_time_on_battery'],
+        'threshold_battery_load': daemon_param_defaults['threshold_battery_load'],
+        'threshold_battery_capacity': daemon_param_defaults['threshold_battery_capacity']}
+
+    # In-process alternatives to daemon scripts, by script name, set with register_handler.  Kept at
+    # class level, so handlers survive a daemon refresh.
+    _daemon_handlers: Dict[str, Callable[[], Tuple[int, str]]] = {}
 
     def __init__(self):
         self.config: Optional[dict] = None
@@ -380,7 +512,10 @@ class UpsDaemon:
             self.set_daemon_parameters()
 
     def __str__(self) -> str:
-        return re.sub(r'\'', '\"', pprint.pformat(self.daemon_params, indent=2, width=120))
+        # Parameters reset to defaults hold the read-only default mapping, display them as plain dicts.
+        daemon_params = {name: dict(value) if isinstance(value, MappingProxyType) else value
+                         for name, value in self.daemon_params.items()}
+        return re.sub(r'\'', '\"', pprint.pformat(daemon_params, indent=2, width=120))
 
     def daemon_format(self, command_name: str, value: Union[int, float, str],
                       gui_text_style: bool = False) -> Union[str, TxtStyle, None]:
@@ -454,7 +589,6 @@ class UpsDaemon:
         :return:  True on success
         """
         read_status = True
-
         def param_error(c_name: str, c_item: str) -> None:
             """ Output standard error messages on issue with reading config file.
 
@@ -476,7 +610,11 @@ class UpsDaemon:
             if c_name == 'DaemonPaths':
                 self.daemon_params[c_item] = os.path.expanduser(c_value)
                 if self.daemon_params[c_item]:
-                    if not os.path.isdir(self.daemon_params[c_item]):
+                    try:
+                        path_st_mode = os.stat(self.daemon_params[c_item]).st_mode
+                    except (OSError, ValueError):
+                        path_st_mode = 0
+                    if not stat.S_ISDIR(path_st_mode):
                         self.daemon_params[c_item] = None
                         UT_CONST.process_message('Config [{}] item [{}] invalid file/path [{}]'.format(
                             c_name, c_item, c_value))
@@ -488,23 +626,26 @@ class UpsDaemon:
                         c_name, c_item, c_value))
                     return False
                 self.daemon_params[c_item] = os.path.join(self.daemon_params['ups_utils_script_path'], c_value)
-                if not os.path.isfile(self.daemon_params[c_item]):
+                try:
+                    path_st_mode = os.stat(self.daemon_params[c_item]).st_mode
+                except (OSError, ValueError):
+                    path_st_mode = 0
+                if not stat.S_ISREG(path_st_mode):
                     self.daemon_params[c_item] = None
                     UT_CONST.process_message('Config [{}] item [{}] invalid file/path [{}]'.format(
                         c_name, c_item, c_value))
             elif c_name == 'DaemonParameters':
-                if re.search(UT_CONST.PATTERNS['INI'], c_value):
-                    params = (0, 0)
-                    if isinstance(c_value, str):
-                        raw_param = re.sub(r'\s+', '', c_value)
-                        params = tuple(int(x) for x in raw_param[1:-1].split(','))
+                ini_match = self._INI_RE.search(c_value)
+                if ini_match:
+                    params = (int(ini_match.group(1)), int(ini_match.group(2)))
                     try:
+                        # Copy on write, the current value may be a read-only default.
                         if c_item == 'read_interval':
-                            self.daemon_params[c_item]['monitor'] = params[0]
-                            self.daemon_params[c_item]['daemon'] = params[1]
+                            self.daemon_params[c_item] = dict(self.daemon_params[c_item],
+                                                              monitor=params[0], daemon=params[1])
                         else:
-                            self.daemon_params[c_item]['crit'] = params[0]
-                            self.daemon_params[c_item]['warn'] = params[1]
+                            self.daemon_params[c_item] = dict(self.daemon_params[c_item],
+                                                              crit=params[0], warn=params[1])
                     except KeyError:
                         UT_CONST.process_message('Config [{}] item [{}] invalid value [{}]'.format(
                             c_name, c_item, c_value))
@@ -513,9 +654,10 @@ class UpsDaemon:
         # Sets all daemon parameter items.  Any unexpected items are skipped.
         for config_name in self.config_name_list:
             config_items = self.daemon_items_dict[config_name]
+            config_section = self.config[config_name]
             for config_item_name in config_items:
-                if config_item_name in self.config[config_name]:
-                    config_item_value = self.config[config_name][config_item_name]
+                if config_item_name in config_section:
+                    config_item_value = config_section[config_item_name]
                     if isinstance(config_item_value, str):
                         param_check_set(config_name, config_item_name, config_item_value)
                     else: param_error(config_name, config_item_name)
@@ -525,44 +667,29 @@ class UpsDaemon:
             os.environ['BOINC_HOME'] = self.daemon_params['boinc_home']
 
         # Check Daemon Parameter Values
+        daemon_params = self.daemon_params
         for parameter_name in self._daemon_param_names:
+            params = daemon_params[parameter_name]
+            defaults = self.daemon_param_defaults[parameter_name]
             if parameter_name == 'read_interval':
                 for sub_parameter_name in ('monitor', 'daemon'):
-                    if self.daemon_params[parameter_name][sub_parameter_name] < \
-                            self.daemon_params[parameter_name]['limit']:
+                    if params[sub_parameter_name] < params['limit']:
                         UT_CONST.process_message('Warning invalid {}-{} value [{}], using defaults'.format(
                                                parameter_name, sub_parameter_name,
-                                               self.daemon_params[parameter_name][sub_parameter_name]), verbose=True)
-                        self.daemon_params[parameter_name] = self.daemon_param_defaults[parameter_name].copy()
+                                               params[sub_parameter_name]), verbose=True)
+                        params = daemon_params[parameter_name] = defaults
             else:
                 reset = False
-                if self.daemon_param_defaults[parameter_name]['limit_type'] == 'high':
-                    if self.daemon_params[parameter_name]['crit'] <= self.daemon_params[parameter_name]['warn']:
-                        reset = True
-                        UT_CONST.process_message('Warning: crit {} NOT > warn {}, using defaults for {}'.format(
-                            self.daemon_params[parameter_name]['crit'], self.daemon_params[parameter_name]['warn'],
-                            parameter_name), verbose=True)
-                    if self.daemon_params[parameter_name]['crit'] > self.daemon_params[parameter_name]['limit']:
-                        reset = True
-                        UT_CONST.process_message('Warning: crit {} NOT <= limit {}, using defaults for {}'.format(
-                            self.daemon_params[parameter_name]['crit'], self.daemon_params[parameter_name]['limit'],
-                            parameter_name), verbose=True)
-                else:
-                    if self.daemon_params[parameter_name]['crit'] >= self.daemon_params[parameter_name]['warn']:
+                crit = params['crit']
+                for bound_name, op_text, is_valid in self._threshold_checks[defaults['limit_type']]:
+                    if not is_valid(crit, params[bound_name]):
                         reset = True
-                        UT_CONST.process_message('Warning: crit {} NOT < warn {}, using defaults for {}'.format(
-                            self.daemon_params[parameter_name]['crit'], self.daemon_params[parameter_name]['warn'],
-                            parameter_name), verbose=True)
-                    if self.daemon_params[parameter_name]['crit'] < self.daemon_params[parameter_name]['limit']:
-                        reset = True
-                        UT_CONST.process_message('Warning: crit {} NOT >= limit {}, using defaults for {}'.format(
-                            self.daemon_params[parameter_name]['crit'], self.daemon_params[parameter_name]['limit'],
-                            parameter_name), verbose=True)
+                        UT_CONST.process_message('Warning: crit {} NOT {} {} {}, using defaults for {}'.format(
+                            crit, op_text, bound_name, params[bound_name], parameter_name), verbose=True)
                 if reset:
-                    self.daemon_params[parameter_name] = self.daemon_param_defaults[parameter_name].copy()
+                    daemon_params[parameter_name] = defaults
                     print('Defaults: {}: crit = {}, warn = {}, limit = {}'.format(parameter_name,
-                          self.daemon_params[parameter_name]['crit'], self.daemon_params[parameter_name]['warn'],
-                          self.daemon_params[parameter_name]['limit']))
+                          defaults['crit'], defaults['warn'], defaults['limit']))
         return read_status
 
     @classmethod
@@ -579,6 +706,21 @@ class UpsDaemon:
             print('    {}: {}{}{}'.format(param_name, color_code, param_value, reset_code))
         print('')
 
+    @classmethod
+    def register_handler(cls, script_name: str, handler: Optional[Callable[[], Tuple[int, str]]]) -> None:
+        """ Register an in-process handler to be called by execute_script instead of running the given
+            daemon script.  The handler takes no arguments and returns a (return code, message) tuple.
+
+        :param script_name: Name of the daemon script to replace
+        :param handler: The handler, or None to run the configured script again
+        """
+        if script_name not in cls._daemon_scripts:
+            raise AttributeError('Error: {} no valid script name: [{}]'.format(script_name, cls._daemon_scripts))
+        if handler is None:
+            cls._daemon_handlers.pop(script_name, None)
+        else:
+            cls._daemon_handlers[script_name] = handler
+
     def execute_script(self, script_name: str) -> Tuple[int, str]:
         """ Execute script defined in the daemon parameters
 
@@ -587,6 +729,14 @@ class UpsDaemon:
         """
         if script_name not in self._daemon_scripts:
             raise AttributeError('Error: {} no valid script name: [{}]'.format(script_name, self._daemon_scripts))
+        handler = self._daemon_handlers.get(script_name)
+        if handler:
+            try:
+                return handler()
+            except Exception as err:  # pylint: disable=broad-except
+                message = 'Error [{}]: could not execute handler for: {}'.format(err, script_name)
+                UT_CONST.process_message(message)
+                return False, message
         if not self.daemon_params[script_name]:
             message = 'No {} defined'.format(script_name)
             UT_CONST.process_message('No {} defined'.format(script_name))
@@ -594,8 +744,6 @@ class UpsDaemon:
         try:
             with subprocess.Popen(shlex.split(self.daemon_params[script_name]),
                                   shell=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as cmd:
-                while cmd.poll() is None:
-                    sleep(0.1)
                 message = cmd.communicate()[0].decode('utf-8')
             LOGGER.debug(message)
             if cmd.returncode:
@@ -610,9 +758,12 @@ class UpsDaemon:
 
 class UpsList:
     """ Object to represent a list of UPSs """
+    __slots__ = ('update_time', 'list', '_name_to_uuid', 'daemon')
+
     def __init__(self, daemon: bool = True, empty: bool = False):
         self.update_time: datetime = UT_CONST.now()
         self.list: Dict[str, UpsItem] = {}
+        self._name_to_uuid: Dict[str, str] = {}
         self.daemon: Optional[UpsDaemon] = UpsDaemon() if daemon else None
         if not empty:
             if not self.read_ups_json():
@@ -664,29 +815,32 @@ class UpsList:
 
     def __setitem__(self, uuid: str, value: UpsItem) -> None:
         self.list[uuid] = value
+        self._name_to_uuid.setdefault(value.prm['display_name'], uuid)
 
-    def __iter__(self) -> Generator[UpsItem, None, None]:
-        for value in self.list.values():
-            yield value
+    def __iter__(self) -> Iterator[UpsItem]:
+        return iter(self.list.values())
 
-    upss = __iter__
+    def upss(self) -> ValuesView[UpsItem]:
+        """ Get UpsItems of the UpsList object.
+
+        :return: View of the UpsItems in the UpsList object.
+        """
+        return self.list.values()
 
-    def items(self) -> Generator[Union[str, UpsItem], None, None]:
+    def items(self) -> ItemsView[str, UpsItem]:
         """
         Get uuid, gpu pairs from a UpsList object.
 
-        :return:  uuid, ups pair
+        :return:  View of uuid, ups pairs
         """
-        for key, value in self.list.items():
-            yield key, value
+        return self.list.items()
 
-    def uuids(self) -> Generator[str, None, None]:
+    def uuids(self) -> KeysView[str]:
         """ Get uuids of the UpsList object.
 
-        :return: uuids from the UpsList object.
+        :return: View of uuids from the UpsList object.
         """
-        for key in self.list:
-            yield key
+        return self.list.keys()
 
     def add(self, ups_item: UpsItem) -> None:
         """ Add given UpsItem to the UpsList.
@@ -702,20 +856,18 @@ class UpsList:
         :param ups_status: Include only UPSs of the given status or all by default
         :return: UpsList of UPSs of specified status
         """
-        try:
-            _ = ups_status.name
-        except AttributeError as error:
-            raise AttributeError('Error: {} not a valid status name'.format(ups_status)) from error
+        if not isinstance(ups_status, UpsStatus):
+            raise AttributeError('Error: {} not a valid status name'.format(ups_status))
 
         result_list = copy.copy(self)
-        uuid_list = []
-        for uuid, ups in self.items():
-            if ups_status != UpsStatus.all:
-                if (invert and ups.prm[ups_status.name]) or (not invert and not ups.prm[ups_status.name]):
-                    uuid_list.append(uuid)
-
-        for uuid in uuid_list:
-            result_list.list.pop(uuid, None)
+        result_list.list = {}
+        result_list._name_to_uuid = {}
+        all_status = ups_status == UpsStatus.all
+        status_name = ups_status.name
+        for uuid, ups in self.list.items():
+            if not all_status and bool(ups.prm[status_name]) == invert:
+                continue
+            result_list[uuid] = ups
         return result_list
 
     def print_daemon_parameters(self) -> None:
@@ -736,7 +888,7 @@ class UpsList:
         :return: The daemon ups object or None if none
         """
         for ups in self.list.values():
-            if ups.prm.daemon:
+            if ups.prm['daemon']:
                 return ups
         return None
 
@@ -746,29 +898,29 @@ class UpsList:
         :param ups_type: Only count UPSs of specific ups_type or all ups_type by default.
         :return: Dictionary of UPS counts
         """
-        try:
-            ups_type_name = ups_type.name
-        except AttributeError as error:
+        if not isinstance(ups_type, UpsType):
             raise AttributeError('Error: {} not a valid vendor name: {}'.format(
-                ups_type, [member.name for member in UpsType])) from error
-        results_dict = {'ups_type': ups_type_name, 'total': 0,
-                        UpsStatus.accessible.name: 0, 'compatible': 0, 'responsive': 0, 'valid': 0, 'daemon': 0}
-        for ups in self.upss():
-            if ups_type != UpsType.all:
-                if ups_type != ups.prm.ups_type:
-                    continue
-            if ups.prm.daemon:
-                results_dict['daemon'] += 1
-            if ups.prm.valid:
-                results_dict['valid'] += 1
-            if ups.prm.accessible:
-                results_dict['accessible'] += 1
-            if ups.prm.compatible:
-                results_dict['compatible'] += 1
-            if ups.prm.responsive:
-                results_dict['responsive'] += 1
-            results_dict['total'] += 1
-        return results_dict
+                ups_type, [member.name for member in UpsType]))
+        ups_type_name = ups_type.name
+        total = daemon = valid = accessible = compatible = responsive = 0
+        all_types = ups_type == UpsType.all
+        for ups in self.list.values():
+            prm = ups.prm
+            if not all_types and ups_type != prm['ups_type']:
+                continue
+            total += 1
+            if prm['daemon']:
+                daemon += 1
+            if prm['valid']:
+                valid += 1
+            if prm['accessible']:
+                accessible += 1
+            if prm['compatible']:
+                compatible += 1
+            if prm['responsive']:
+                responsive += 1
+        return {'ups_type': ups_type_name, 'total': total, UpsStatus.accessible.name: accessible,
+                'compatible': compatible, 'responsive': responsive, 'valid': valid, 'daemon': daemon}
 
     def read_all_ups_list_items(self, cmd_group: MibGroup, errups: bool = True, display: bool = False) -> bool:
         """ Get the specified list of monitor mib commands for all UPSs.
@@ -780,11 +932,17 @@ class UpsList:
         """
         if UT_CONST.refresh_daemon:
             self.read_set_daemon()
-        for ups in self.upss():
-            if not errups:
-                if not ups.prm.responsive:
-                    continue
-            ups.read_ups_list_items(cmd_group, display=display)
+        ups_items = [ups for ups in self.list.values() if errups or ups.prm['responsive']]
+        # Read serially when displaying, so output from different UPSs is not interleaved.
+        if display or len(ups_items) < 2:
+            for ups in ups_items:
+                ups.read_ups_list_items(cmd_group, display=display)
+            return True
+        # Reads are dominated by waiting on snmp responses, so poll all UPSs concurrently.
+        with ThreadPoolExecutor(max_workers=min(32, len(ups_items))) as executor:
+            futures = [executor.submit(ups.read_ups_list_items, cmd_group, display=display) for ups in ups_items]
+            for future in futures:
+                future.result()
         return True
 
     def read_ups_json(self) -> bool:
@@ -815,22 +973,32 @@ class UpsList:
             UT_CONST.process_message("Error: File format error for [{}]:\n       {}".format(
                 UT_CONST.ups_json_file, error), verbose=True)
             return False
-        for ups_dict in ups_items.values():
-            uuid = uuid4().hex
+        ups_dicts: List[dict] = []
+        for ups_key, ups_dict in ups_items.items():
+            # Derived from the config entry, so a UPS keeps its uuid across reads and runs.
+            uuid = uuid5(NAMESPACE_OID, '{}|{}|{}'.format(ups_key, ups_dict.get('ups_IP'),
+                                                          ups_dict.get('display_name'))).hex
             ups_dict['uuid'] = uuid
-            self.list[uuid] = UpsItem(ups_dict)
+            ups_dicts.append(ups_dict)
+        if len(ups_dicts) < 2:
+            for ups_dict in ups_dicts:
+                self.add(UpsItem(ups_dict))
+            return True
+        # Each UpsItem probes its UPS on creation, so create them concurrently.  Items are added in config order.
+        with ThreadPoolExecutor(max_workers=min(32, len(ups_dicts))) as executor:
+            for ups_item in executor.map(UpsItem, ups_dicts):
+                self.add(ups_item)
         return True
 
     # Methods to get, check, and list UPSs
-    def get_name_for_ups_uuid(self, ups_uuid: int) -> Optional[str]:
+    def get_name_for_ups_uuid(self, ups_uuid: str) -> Optional[str]:
         """ Get the ups name for a given uuid
 
         :param ups_uuid: Universally unique identifier for a UPS
         :return: name of the ups or None if not found
         """
-        for ups in self.upss():
-            if ups['uuid'] == ups_uuid:
-                return ups['display_name']
+        if ups_uuid in self.list:
+            return self.list[ups_uuid].prm['display_name']
         return None
 
     def get_uuid_for_ups_name(self, ups_name: str) -> Optional[str]:
@@ -839,24 +1007,18 @@ class UpsList:
         :param ups_name: The target ups name.
         :return: The uuid as str or None if not found
         """
-        for ups in self.upss():
-            if ups['display_name'] == ups_name:
-                return ups['uuid']
-        return None
+        return self._name_to_uuid.get(ups_name)
 
     def get_ups_type_list(self) -> Tuple[UpsType]:
         """ Get a tuple of unique ups types.
 
         :return: A tuple of unique types.
         """
-        type_list: List[UpsType] = []
-        for ups in self.upss():
-            if ups.prm.ups_type not in type_list:
-                type_list.append(ups.prm.ups_type)
-        return tuple(type_list)
+        # dict keys keep the first-seen order of the types.
+        return tuple({ups.prm['ups_type']: None for ups in self.list.values()})
 
     @staticmethod
-    def get_mib_commands(cmd_group: MibGroup) -> Set[MiB]:
+    def get_mib_commands(cmd_group: MibGroup) -> FrozenSet[MiB]:
         """ Returns all command mib names of the given group """
         return UpsComm.all_mib_cmd_names[cmd_group]
 
@@ -1088,20 +1250,22 @@ class UpsComm:
 
     _valid_type_keys = [x.name for x in all_mib_cmds]
     # UPS MiB Commands lists
-    _mib_all_apc_ap96xx: Set[str] = set(all_mib_cmds[UpsType.apc_ap96xx].keys())
-    _mib_all_eaton_pw: Set[str] = set(all_mib_cmds[UpsType.eaton_pw].keys())
-    _mib_statmon: Set[MiB] = {MiB.ups_name, MiB.ups_type, MiB.ups_location, MiB.ups_info, MiB.ups_model}
-    _mib_static: Set[MiB] = {MiB.ups_name, MiB.ups_info, MiB.bios_serial_number, MiB.firmware_revision,
-                             MiB.ups_type, MiB.ups_location, MiB.ups_uptime}
-    _mib_dynamic: Set[MiB] = {MiB.ups_env_temp, MiB.battery_capacity, MiB.time_on_battery,
-                              MiB.battery_runtime_remain, MiB.input_voltage, MiB.input_frequency,
-                              MiB.output_voltage, MiB.output_frequency, MiB.output_load,
-                              MiB.output_current, MiB.output_power, MiB.system_status,
-                              MiB.battery_status}
-    _mib_output: Set[MiB] = {MiB.output_voltage, MiB.output_frequency, MiB.output_load,
-                             MiB.output_current, MiB.output_power, MiB.ups_model}
-    _mib_input: Set[MiB] = {MiB.input_voltage, MiB.input_frequency, MiB.ups_model}
-    all_mib_cmd_names: Dict[MibGroup, Set[MiB]] = {
+    _mib_all_apc_ap96xx: FrozenSet[MiB] = frozenset(all_mib_cmds[UpsType.apc_ap96xx].keys())
+    _mib_all_eaton_pw: FrozenSet[MiB] = frozenset(all_mib_cmds[UpsType.eaton_pw].keys())
+    _mib_statmon: FrozenSet[MiB] = frozenset({MiB.ups_name, MiB.ups_type, MiB.ups_location, MiB.ups_info,
+                                              MiB.ups_model})
+    _mib_static: FrozenSet[MiB] = frozenset({MiB.ups_name, MiB.ups_info, MiB.bios_serial_number,
+                                             MiB.firmware_revision, MiB.ups_type, MiB.ups_location,
+                                             MiB.ups_uptime})
+    _mib_dynamic: FrozenSet[MiB] = frozenset({MiB.ups_env_temp, MiB.battery_capacity, MiB.time_on_battery,
+                                              MiB.battery_runtime_remain, MiB.input_voltage, MiB.input_frequency,
+                                              MiB.output_voltage, MiB.output_frequency, MiB.output_load,
+                                              MiB.output_current, MiB.output_power, MiB.system_status,
+                                              MiB.battery_status})
+    _mib_output: FrozenSet[MiB] = frozenset({MiB.output_voltage, MiB.output_frequency, MiB.output_load,
+                                             MiB.output_current, MiB.output_power, MiB.ups_model})
+    _mib_input: FrozenSet[MiB] = frozenset({MiB.input_voltage, MiB.input_frequency, MiB.ups_model})
+    all_mib_cmd_names: Dict[MibGroup, FrozenSet[MiB]] = {
         MibGroup.all:       _mib_all_apc_ap96xx,   # I choose all to be apc since eaton is a subset of apc.
         MibGroup.all_apc:   _mib_all_apc_ap96xx,
         MibGroup.all_eaton: _mib_all_eaton_pw,
@@ -1111,6 +1275,11 @@ class UpsComm:
         MibGroup.static:    _mib_static,
         MibGroup.dynamic:   _mib_dynamic}
     # MIB Command Lists
+    # Maximum OIDs per snmpget request, keeps responses well within a single datagram.
+    _snmp_max_oids: int = 16
+    # Eaton values reported in tenths of their unit.
+    _eaton_scaled_mibs: FrozenSet[MiB] = frozenset({MiB.output_voltage, MiB.output_frequency, MiB.output_current,
+                                                    MiB.input_voltage, MiB.input_frequency, MiB.system_temperature})
 
     # Check if snmp tools are installed
     _snmp_command: str = shutil.which('snmpget')
@@ -1125,14 +1294,14 @@ class UpsComm:
         self.snmp_command = self._snmp_command
         self.daemon: bool = ups_item.prm.daemon
         self.ups_type = ups_item.prm['ups_type']
-        if ups_item.prm['ups_type'] in UpsType.list():
+        if UpsType.has_name(ups_item.prm['ups_type']):
             self.ups_type = ups_item.prm['ups_type'] = UpsType[ups_item.prm['ups_type']]
         try:
             self.mib_commands = self.all_mib_cmds[self.ups_type]
         except KeyError:
             print('Invalid entry in [{}].  Value {} not in {}'.format(
                   UT_CONST.ups_json_file, ups_item.prm['ups_type'], self._valid_type_keys))
-            ups_item.valid = False
+            ups_item.prm['valid'] = False
 
     @staticmethod
     def is_valid_ip_fqdn(test_value: str) -> bool:
@@ -1141,9 +1310,9 @@ class UpsComm:
         :param test_value: String to be tested.
         :return:  True if valid
         """
-        if not re.search(UT_CONST.PATTERNS['IPV4'], test_value):
-            if not re.search(UT_CONST.PATTERNS['FQDN'], test_value):
-                if not re.search(UT_CONST.PATTERNS['IPV6'], test_value):
+        if not UT_CONST.PATTERNS['IPV4'].search(test_value):
+            if not UT_CONST.PATTERNS['FQDN'].search(test_value):
+                if not UT_CONST.PATTERNS['IPV6'].search(test_value):
                     UT_CONST.process_message('ERROR: IP Address entry [{}]'.format(test_value), verbose=True)
                     return False
         return True
@@ -1159,7 +1328,26 @@ class UpsComm:
         if not ip_fqdn: return False
         if validate:
             if not self.is_valid_ip_fqdn(ip_fqdn): return False
-        return not bool(os.system('ping -c 1 {} > /dev/null'.format(ip_fqdn)))
+        # Run ping directly instead of through a shell, waiting at most a second for the reply.
+        # The timeout bounds a stalled name lookup, which -W does not cover.
+        try:
+            return not subprocess.run(['ping', '-c', '1', '-W', '1', ip_fqdn], stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL, check=False, timeout=2).returncode
+        except subprocess.TimeoutExpired:
+            LOGGER.debug('ping timeout for %s', ip_fqdn)
+            return False
+        except OSError as err:
+            LOGGER.debug('ping execution error: %s', err)
+            return False
+
+    def snmp_argv(self, ups: UpsItem, *options: str) -> List[str]:
+        """ Return the snmpget argument list for the given UPS, without OIDs.
+
+        :param ups:  The target ups.
+        :param options:  Additional snmpget options.
+        :return:  List of arguments ready to be extended with OIDs.
+        """
+        return [self.snmp_command, '-v2c', *options, '-c', str(ups.prm['snmp_community']), str(ups.prm['ups_IP'])]
 
     def check_snmp_response(self, ups: UpsItem) -> bool:
         """ Check if the IP address for the target UPS, responds to snmp command.
@@ -1167,15 +1355,13 @@ class UpsComm:
         :param ups:  The target ups dictionary from list or None.
         :return:  True if the given IP address responds, else False
         """
-        cmd_str = '{} -v2c -c {} {} {}'.format(self.snmp_command, ups.prm['snmp_community'],
-                                               ups.prm['ups_IP'], 'iso.3.6.1.2.1.1.1.0')
-
+        cmd_argv = self.snmp_argv(ups) + ['iso.3.6.1.2.1.1.1.0']
         try:
-            snmp_output = subprocess.check_output(shlex.split(cmd_str), shell=False,
-                                                  stderr=subprocess.DEVNULL).decode().split('\n')
-            LOGGER.debug(snmp_output)
+            # Only a successful response matters here, so the output is logged without decoding it.
+            snmp_output = subprocess.check_output(cmd_argv, shell=False, stderr=subprocess.DEVNULL)
+            LOGGER.debug('snmp response: %s', snmp_output)
         except subprocess.CalledProcessError as err:
-            LOGGER.debug('%s execution error: %s', cmd_str, err)
+            LOGGER.debug('%s execution error: %s', cmd_argv, err)
             return False
         return True
 
@@ -1187,11 +1373,12 @@ class UpsComm:
         :param display: Flag to indicate if parameters should be displayed as read.
         :return:  True on success
         """
-        for cmd in UpsComm.all_mib_cmd_names[cmd_group]:
-            if cmd in ups.skip_list: continue
-            ups.prm[cmd] = self.send_snmp_command(cmd, ups, display=display)
+        cmd_list = [cmd for cmd in UpsComm.all_mib_cmd_names[cmd_group] if cmd not in ups.skip_list]
+        cmd_values = self.send_snmp_commands(cmd_list, ups, display=display)
+        for cmd in cmd_list:
+            ups.prm[cmd] = cmd_values[cmd]
             if ups.prm[cmd] in {None, '', 'none'}:
-                ups.skip_list.append(cmd)
+                ups.skip_list.add(cmd)
                 ups.prm[cmd] = '---'
                 UT_CONST.process_message('UPS {} invalid response: Skipping: {}'.format(
                     ups['display_name'], cmd), verbose=False)
@@ -1223,48 +1410,101 @@ class UpsComm:
         :param display: If true the results will be printed
         :return:  The results from the read, could be str, int or tuple
         """
+        return self.send_snmp_commands([command_mib], ups, display=display)[command_mib]
+
+    def send_snmp_commands(self, command_mibs: List[MiB], ups: UpsItem,
+                           display: bool = False) -> Dict[MiB, Union[str, int, float, None]]:
+        """ Read the results of several mib commands for specified UPS, using multi OID requests.
+
+        :param command_mibs:  Commands to be read from the target UPS
+        :param ups:  The target ups item
+        :param display: If true the results will be printed
+        :return:  Dictionary of decoded results by command
+        """
         if not ups.is_responsive():
-            return 'Invalid UPS'
+            return {command_mib: 'Invalid UPS' for command_mib in command_mibs}
         snmp_mib_commands = ups.prm.mib_commands
-        if command_mib not in snmp_mib_commands:
-            return 'No data'
-        cmd_mib = snmp_mib_commands[command_mib]['iso']
-        cmd_str = '{} -v2c -c {} {} {}'.format(self.snmp_command, ups.prm['snmp_community'],
-                                               ups.prm['ups_IP'], cmd_mib)
-        try:
-            snmp_output = subprocess.check_output(shlex.split(cmd_str), shell=False,
-                                                  stderr=subprocess.DEVNULL).decode().split('\n')
-        except subprocess.CalledProcessError:
-            LOGGER.debug('Error executing snmp %s command [%s] to %s at %s.',
-                         command_mib, cmd_mib, ups.prm.display_name, ups.ups_ip())
-            return None
+        results: Dict[MiB, Union[str, int, float, None]] = {}
+        raw_values = self.send_snmp_bulk([command_mib for command_mib in command_mibs
+                                          if command_mib in snmp_mib_commands], ups)
+        for command_mib in command_mibs:
+            if command_mib not in snmp_mib_commands:
+                results[command_mib] = 'No data'
+            else:
+                results[command_mib] = self.decode_snmp_value(command_mib, raw_values[command_mib], ups, display)
+        return results
+
+    def send_snmp_bulk(self, command_mibs: List[MiB], ups: UpsItem) -> Dict[MiB, Optional[str]]:
+        """ Read raw values for the given mib commands, packing up to _snmp_max_oids OIDs into each
+            snmpget request instead of one request per command.
 
-        value: Union[str, int, float, None] = None
+        :param command_mibs:  Commands to be read from the target UPS
+        :param ups:  The target ups item
+        :return:  Dictionary of raw values by command, None for commands with no valid response
+        """
+        snmp_mib_commands = ups.prm.mib_commands
+        raw_values: Dict[MiB, Optional[str]] = {command_mib: None for command_mib in command_mibs}
+        # Some commands share an OID, so each OID is requested once and its value used for all its commands.
+        oid_commands: Dict[str, List[MiB]] = {}
+        for command_mib in command_mibs:
+            oid_commands.setdefault(snmp_mib_commands[command_mib]['iso'], []).append(command_mib)
+        oid_list = list(oid_commands)
+        # Numeric OIDs (-On) in the output, so responses can be matched even if MIB files are installed.
+        snmp_argv = self.snmp_argv(ups, '-On')
+        for batch_start in range(0, len(oid_list), self._snmp_max_oids):
+            oid_batch = oid_list[batch_start:batch_start + self._snmp_max_oids]
+            try:
+                snmp_output = subprocess.check_output(snmp_argv + oid_batch, shell=False,
+                                                      stderr=subprocess.DEVNULL).decode(errors='replace').splitlines()
+            except subprocess.CalledProcessError:
+                LOGGER.debug('Error executing snmp command [%s] to %s at %s.',
+                             oid_batch, ups.prm.display_name, ups.ups_ip())
+                continue
+            pending_oids = {oid: oid_commands[oid] for oid in oid_batch}
+            for line in snmp_output:
+                if not line: continue
+                LOGGER.debug('    Raw data: %s', line)
+                # Only lines of the form 'oid = TYPE: value' carry a value.
+                oid, separator, value = line.partition(' = ')
+                if not separator or ':' not in value: continue
+                # Output OIDs are numeric, starting with .1 where the table uses iso.
+                oid = 'iso{}'.format(oid[2:]) if oid.startswith('.1.') else oid
+                # The first value for an OID is used, later lines are continuations or repeats.
+                batch_commands = pending_oids.pop(oid, None)
+                if batch_commands is None: continue
+                raw_value = value.split(':', 1)[1].replace('"', '').strip()
+                for command_mib in batch_commands:
+                    raw_values[command_mib] = raw_value
+                if not pending_oids: break
+        return raw_values
+
+    def decode_snmp_value(self, command_mib: MiB, value: Optional[str], ups: UpsItem,
+                          display: bool = False) -> Union[str, int, float, None]:
+        """ Decode the raw snmp value of the given command for the specified UPS.
 
+        :param command_mib:  The command the value was read for
+        :param value:  The raw value read from the UPS
+        :param ups:  The target ups item
+        :param display: If true the results will be printed
+        :return:  The decoded value, could be str, int or tuple
+        """
+        if value is None:
+            LOGGER.debug('Error executing snmp %s command to %s at %s.',
+                         command_mib, ups.prm.display_name, ups.ups_ip())
+            return None
+        mib_command = ups.prm['mib_commands'][command_mib]
+        ups_type = ups.prm['ups_type']
         LOGGER.debug('### command_name: %s', command_mib)
-        for line in snmp_output:
-            if not line: continue
-            LOGGER.debug('    Raw data: %s', line)
-            if re.match(UT_CONST.PATTERNS['SNMP_VALUE'], line):
-                value = line.split(':', 1)[1]
-                value = re.sub(r'\"', '', value).strip()
-        if snmp_mib_commands[command_mib]['decode']:
-            if value in snmp_mib_commands[command_mib]['decode'].keys():
-                value = snmp_mib_commands[command_mib]['decode'][value]
-        if ups.prm['ups_type'] == UpsType.eaton_pw:
-            if command_mib in (MiB.output_voltage, MiB.output_frequency):
-                value = int(value) / 10.0
-            elif command_mib == MiB.output_current:
-                value = int(value) / 10.0
-            elif command_mib in (MiB.input_voltage, MiB.input_frequency):
-                value = int(value) / 10.0
-            elif command_mib == MiB.system_temperature:
-                value = int(value) / 10.0
-        if command_mib == MiB.system_status and ups.prm['ups_type'] == UpsType.apc_ap96xx:
+        decode = mib_command['decode']
+        if decode:
+            value = decode.get(value, value)
+        if ups_type == UpsType.eaton_pw and command_mib in self._eaton_scaled_mibs:
+            value = int(value) / 10.0
+        if command_mib == MiB.system_status and ups_type == UpsType.apc_ap96xx:
             value = self.bit_str_decoder(value, self.decoders['apc_system_status'])
         if command_mib in (MiB.time_on_battery, MiB.battery_runtime_remain):
             # Create a minute, string tuple
-            if ups.prm['ups_type'] == UpsType.eaton_pw:
+            if ups_type == UpsType.eaton_pw:
                 # Process time for eaton_pw
                 if command_mib == MiB.time_on_battery:
                     # Measured in seconds.
@@ -1275,36 +1515,46 @@ class UpsComm:
                 value = round(float(value) / 60.0, 2)
             else:
                 # Process time for APC, measured in hundredths of seconds
-                value_items = re.sub(r'\(', '', value).split(')')
+                value_items = value.replace('(', '').split(')')
                 value = round(float(value_items[0]) / 100 / 60, 2) if len(value_items) >= 2 else None
         if display:
-            if command_mib == MiB.output_current and ups.prm['ups_type'] == UpsType.eaton_pw:
-                print('{}: {} - raw, uncorrected value.'.format(snmp_mib_commands[command_mib]['name'], value))
+            if command_mib == MiB.output_current and ups_type == UpsType.eaton_pw:
+                print('{}: {} - raw, uncorrected value.'.format(mib_command['name'], value))
             else:
-                print('{}: {}'.format(snmp_mib_commands[command_mib]['name'], value))
+                print('{}: {}'.format(mib_command['name'], value))
         LOGGER.debug('    Value: %s', value)
         return value
 
-    @staticmethod
-    def bit_str_decoder(value: str, decode_key: tuple) -> str:
+    @classmethod
+    def bit_str_decoder(cls, value: str, decode_key: tuple) -> str:
         """ Bit string decoder
 
         :param value: A string representing a bit encoded set of flags
         :param decode_key: A list representing the meaning of a 1 for each bit field
         :return: A string of concatenated bit decode strings
         """
-        value_str = ''
-        for index, bit_value in enumerate(value):
-            if index > len(decode_key):
-                break
-            if bit_value == '1':
-                if value_str == '':
-                    value_str = decode_key[index]
-                else:
-                    value_str = '{}-{}'.format(value_str, decode_key[index])
-        return value_str
+        # First character of the bit string is the first decode key, so reverse it to make that bit 0.
+        bit_str = value[:len(decode_key)][::-1]
+        if bit_str.strip('01'):
+            bit_str = ''.join('1' if bit_value == '1' else '0' for bit_value in bit_str)
+        return '-'.join(cls.decode_bits(int('0' + bit_str, 2), decode_key))
 
-    def get_mib_commands(self, cmd_group: MibGroup) -> Set[MiB]:
+    @staticmethod
+    def decode_bits(bit_mask: int, decode_key: tuple) -> List[str]:
+        """ Decode the set bits of a bit mask.  Only set bits are visited, lowest first.
+
+        :param bit_mask: The bit encoded set of flags as an int
+        :param decode_key: A list representing the meaning of each bit, starting with bit 0
+        :return: A list of decode strings for the set bits
+        """
+        decoded: List[str] = []
+        while bit_mask:
+            low_bit = bit_mask & -bit_mask
+            decoded.append(decode_key[low_bit.bit_length() - 1])
+            bit_mask ^= low_bit
+        return decoded
+
+    def get_mib_commands(self, cmd_group: MibGroup) -> FrozenSet[MiB]:
         """ Returns all command mib names of the given group """
         return self.all_mib_cmd_names[cmd_group]
 
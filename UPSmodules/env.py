@@ -89,7 +89,6 @@ class UtConst:
     # FQDN regex credit: https://stackoverflow.com/questions/2532053/validate-a-hostname-string
     # IPV6 regex credit: https://gist.github.com/syzdek/6086792
     PATTERNS = {'HEXRGB': re.compile(r'^#[\da-fA-F]{6}'),
-                'SNMP_VALUE': re.compile(r'.*=.*:.*'),
                 'IPV4': re.compile(r'^(\d{1,3})(.\d{1,3}){3}$'),
                 'IPV6': re.compile(r'^(([\da-fA-F]{1,4}:){7}[\da-fA-F]{1,4}|([\da-fA-F]{1,4}:){1,7}:|'
                                    r'([\da-fA-F]{1,4}:){1,6}:[\da-fA-F]{1,4}|([\da-fA-F]{1,4}:){1,5}'
@@ -106,7 +105,7 @@ class UtConst:
                 'ONLINE': re.compile(r'(.*Standby.*)|(.*OnLine.*)', re.IGNORECASE),
                 'APC': re.compile(r'^apc[_-].*', re.IGNORECASE),
                 'APC96': re.compile(r'^apc[_-]ap96.*', re.IGNORECASE),
-                'INI': re.compile(r'^\(\s*\d+\s*,\s*\d+\s*\)\s*$'),
+                'INI': re.compile(r'^\(\s*(\d+)\s*,\s*(\d+)\s*\)\s*$'),
                 'NORMAL': re.compile(r'(.*Battery Normal.*)', re.IGNORECASE)}
 
     mark_up_codes: Dict[MarkUpCodes, str] = {
@@ -147,12 +146,14 @@ class UtConst:
                                           'pypi-linux': '{}/.local/share/rickslab-ups-utils/config'.format(str(Path.home()))}
     _icons: Dict[str, str] = {'ups-mon': 'ups-utils-monitor.icon.png'}
     _config_file_names: Dict[str, str] = {'json': 'ups-config.json', 'ini': 'ups-utils.ini'}
-    _all_args: Set[str] = {'debug', 'show_unresponsive', 'log', 'no_markup', 'ltz', 'verbose', 'sleep'}
+    _all_args: Set[str] = {'debug', 'show_unresponsive', 'log', 'no_markup', 'ltz', 'verbose', 'sleep', 'no_cache'}
 
     # Public items
     config_files: Dict[str, Optional[str]] = {'json': None, 'ini': None}
     gui_window_title: str = 'Ricks-Lab UPS Utilities'
     gui_monitor_icon_file: str = 'ups-utils-monitor.icon.png'
+    probe_cache_file: str = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(str(Path.home()), '.cache'),
+                                         'rickslab-ups-utils', 'probe.json')
     TIME_FORMAT: str = '%d-%b-%Y %H:%M:%S %z'
 
     def __init__(self):
@@ -211,6 +212,7 @@ class UtConst:
         self.ltz = datetime.utcnow().astimezone().tzinfo
         self.verbose = False
         self.sleep: int = 30
+        self.no_cache: bool = False
 
     def set_env_args(self, args: argparse.Namespace, program_name: str = None) -> None:
         """
@@ -237,6 +239,7 @@ class UtConst:
                 elif target_arg == 'verbose': self.verbose = self.args.verbose
                 elif target_arg == 'sleep': self.sleep = self.args.sleep
                 elif target_arg == 'ltz': self.use_ltz = self.args.ltz
+                elif target_arg == 'no_cache': self.no_cache = self.args.no_cache
         LOGGER.propagate = False
         formatter = logging.Formatter("%(levelname)s:%(name)s:%(module)s.%(funcName)s:%(message)s")
         stream_handler = logging.StreamHandler()